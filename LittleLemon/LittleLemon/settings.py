@@ -83,6 +83,11 @@ DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
         "NAME": BASE_DIR / "db.sqlite3",
+        # A file (not shared-cache memory) so concurrency tests see real SQLite locking.
+        "TEST": {"NAME": BASE_DIR / "test_db.sqlite3"},
+        # Take the write lock when a transaction starts, so concurrent checkouts
+        # queue on the busy timeout instead of failing on a lock upgrade.
+        "OPTIONS": {"transaction_mode": "IMMEDIATE"},
     }
 }
 
@@ -162,3 +167,23 @@ DJOSER = {
     "USER_ID_FIELD": "username",
 }
     
+JOBS = {
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 5,
+    "RETRY_BACKOFF_MAX": 600,
+    "BATCH_SIZE": 10,
+    "VISIBILITY_TIMEOUT": 300,
+    "METRICS_WINDOW": 60 * 60,
+    "RETENTION": 7 * 24 * 60 * 60,
+}
+
+IDEMPOTENCY = {
+    "TTL": 24 * 60 * 60,
+    "LOCK_TIMEOUT": 5,
+    "LEASE": 30,
+    "PURGE_BATCH_SIZE": 1000,
+}
+
+HTTP_CACHE = {
+    "PUBLIC_MAX_AGE": 60,
+}
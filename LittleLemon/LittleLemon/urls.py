@@ -15,11 +15,10 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 
-from django.contrib import admin
+from django.apps import apps
 from django.urls import path, include
 from rest_framework.authtoken.views import obtain_auth_token
 urlpatterns = [
-    path("admin/", admin.site.urls),
     path(
         "api/", include("LittleLemonAPI.urls")
     ),  # Add this line to the urlpatterns list
@@ -28,3 +27,9 @@ urlpatterns = [
     path("token/login/", obtain_auth_token, name="token_obtain_pair"),
 
 ]
+
+# The lean API settings leave the admin out; don't import it there at all.
+if apps.is_installed("django.contrib.admin"):
+    from django.contrib import admin
+
+    urlpatterns.append(path("admin/", admin.site.urls))
@@ -0,0 +1,98 @@
+from datetime import date, timedelta
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils.dateparse import parse_date
+from rest_framework.exceptions import ValidationError
+
+from .conditional import bump_version
+from .models import ArchivedOrder, Order
+from .utils import raw_delete
+
+DEFAULT_BATCH_SIZE = 1000
+
+ORDER_COLUMNS = [field.attname for field in Order._meta.concrete_fields]
+ORDER_FIELDS = [field.name for field in Order._meta.concrete_fields]
+
+
+def archive_orders(older_than, batch_size=DEFAULT_BATCH_SIZE):
+    """
+    Move delivered orders dated before `older_than` into the archive table, one
+    transaction per batch so the hot table is never locked for long.
+    """
+    moved = 0
+    while True:
+        with transaction.atomic():
+            ids = list(Order.objects.filter(status=True, date__lt=older_than)
+                       .order_by("id").values_list("id", flat=True)[:batch_size])
+            if not ids:
+                break
+            rows = Order.objects.filter(id__in=ids).values(*ORDER_COLUMNS)
+            ArchivedOrder.objects.bulk_create([ArchivedOrder(**row) for row in rows])
+            raw_delete(Order.objects.filter(id__in=ids))
+        moved += len(ids)
+        bump_version("orders")
+    return moved
+
+
+def cutoff_date(days):
+    return date.today() - timedelta(days=days)
+
+
+def archive_horizon():
+    """
+    The most recent date held in the archive, or None if nothing is archived.
+    """
+    return ArchivedOrder.objects.aggregate(horizon=Max("date"))["horizon"]
+
+
+def query_date(request, name):
+    value = request.query_params.get(name)
+    if not value:
+        return None
+    try:
+        parsed = parse_date(value)
+    except ValueError:
+        parsed = None
+    if parsed is None:
+        raise ValidationError({"message": "%s must be a date in YYYY-MM-DD format" % name})
+    return parsed
+
+
+def date_range(request):
+    """
+    The `?date_from=` / `?date_to=` filter of a request as dates (None if absent).
+    Raises ValidationError (a 400) for values that aren't valid dates.
+    """
+    return query_date(request, "date_from"), query_date(request, "date_to")
+
+
+def filter_dates(queryset, date_from, date_to):
+    if date_from:
+        queryset = queryset.filter(date__gte=date_from)
+    if date_to:
+        queryset = queryset.filter(date__lte=date_to)
+    return queryset
+
+
+def reaches_archive(date_from, date_to):
+    """
+    Whether a date filter can match archived orders. A range with no lower bound
+    reaches back indefinitely, so only an unfiltered list stays on the hot table.
+    """
+    if date_from is None and date_to is None:
+        return False
+    horizon = archive_horizon()
+    return horizon is not None and (date_from is None or date_from <= horizon)
+
+
+def union_fields(queryset, ordering):
+    """
+    The explicit field list both sides of the hot/archive UNION must select: the
+    fields the (possibly projected) hot queryset loads plus every ordering column.
+    """
+    names, defer = queryset.query.deferred_loading
+    fields = set(ORDER_FIELDS) - set(names) if defer else set(names)
+    fields.update(name.lstrip("-") for name in ordering)
+    fields.add("id")
+    return [name for name in ORDER_FIELDS if name in fields]
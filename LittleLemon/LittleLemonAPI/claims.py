@@ -0,0 +1,41 @@
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .conditional import bump_version
+from .jobs import enqueue
+from .models import Order
+
+MAX_CLAIM = 20
+
+
+def claimable_orders():
+    return Order.objects.filter(delivery_crew__isnull=True).exclude(status=True).order_by("date", "id")
+
+
+def claim_orders(crew, count):
+    """
+    Assign up to `count` unassigned orders to `crew` and return their ids. Rows
+    another crew member is claiming are skipped rather than waited on, so any
+    number of claims can run at once without handing out an order twice.
+    """
+    count = max(1, min(count, MAX_CLAIM))
+    now = timezone.now()
+    if connection.features.has_select_for_update_skip_locked:
+        with transaction.atomic():
+            ids = list(claimable_orders().select_for_update(skip_locked=True).values_list("id", flat=True)[:count])
+            Order.objects.filter(id__in=ids).update(delivery_crew=crew, updated_at=now)
+    else:
+        # No row locks (SQLite): each claim is its own short autocommitted
+        # conditional UPDATE, and only one claimant can still see the row unassigned.
+        ids = []
+        while len(ids) < count:
+            candidates = list(claimable_orders().values_list("id", flat=True)[:count - len(ids)])
+            if not candidates:
+                break
+            for order_id in candidates:
+                if Order.objects.filter(id=order_id, delivery_crew__isnull=True).update(delivery_crew=crew, updated_at=now):
+                    ids.append(order_id)
+    if ids:
+        bump_version("orders")
+        enqueue("order_updated", order_ids=ids, changes={"delivery_crew": crew.id})
+    return ids
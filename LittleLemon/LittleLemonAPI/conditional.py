@@ -0,0 +1,119 @@
+import hashlib
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from .models import ArchivedOrder, Category, CollectionVersion, MenuItem, Order
+
+# Collections whose version changes whenever a row of the model changes. Menu items
+# embed their category, so a category change invalidates the menu too. Archived
+# orders are served by the orders list, so they share its version.
+COLLECTIONS = {
+    Category: ("categories", "menu-items"),
+    MenuItem: ("menu-items", "availability"),
+    Order: ("orders",),
+    ArchivedOrder: ("orders",),
+}
+
+
+def http_cache_setting(name):
+    return getattr(settings, "HTTP_CACHE", {}).get(name, 60)
+
+
+def bump_version(*names):
+    """
+    Invalidate cached representations of the named collections. Call this after
+    queryset.update()/bulk writes, which bypass the model signals.
+    """
+    now = timezone.now()
+    for name in names:
+        if not CollectionVersion.objects.filter(name=name).update(version=F("version") + 1, updated_at=now):
+            try:
+                with transaction.atomic():
+                    CollectionVersion.objects.create(name=name, version=1, updated_at=now)
+            except IntegrityError:
+                CollectionVersion.objects.filter(name=name).update(version=F("version") + 1, updated_at=now)
+
+
+def bump_version_on_commit(*names):
+    """
+    Bump the versions once the current transaction commits (right away outside
+    one). The counters are single hot rows, so writing them inside a business
+    transaction would serialize every writer on them until it commits.
+    """
+    transaction.on_commit(lambda: bump_version(*names))
+
+
+def get_version(name):
+    version = CollectionVersion.objects.filter(name=name).values_list("version", "updated_at").first()
+    if version is None:
+        bump_version(name)
+        return get_version(name)
+    return version
+
+
+def collection_changed(sender, instance, **kwargs):
+    if sender is Category:
+        MenuItem.objects.filter(category_id=instance.pk).update(updated_at=timezone.now())
+    bump_version_on_commit(*COLLECTIONS[sender])
+
+
+for model in COLLECTIONS:
+    post_save.connect(collection_changed, sender=model, dispatch_uid="conditional-save-" + model.__name__)
+    post_delete.connect(collection_changed, sender=model, dispatch_uid="conditional-delete-" + model.__name__)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.md5(":".join(str(part) for part in parts).encode()).hexdigest())
+
+
+class ConditionalGetMixin:
+    """
+    Answer GETs with 304 Not Modified when the client's ETag/Last-Modified are still
+    current. Lists are validated against a per-collection version counter and single
+    objects against their `updated_at`, so neither needs the full query or serializer.
+    """
+    collection = None
+    public_cache = False
+
+    def cache_scope(self, request):
+        return "public" if self.public_cache else request.user.pk
+
+    def list(self, request, *args, **kwargs):
+        version, updated_at = get_version(self.collection)
+        etag = make_etag(self.collection, version, self.cache_scope(request), request.get_full_path())
+        return self.conditional_response(request, etag, updated_at, super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        lookup = {self.lookup_field: self.kwargs[lookup_url_kwarg]}
+        updated_at = self.get_queryset().filter(**lookup).values_list("updated_at", flat=True).first()
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        # The query string (?fields=/?omit=) changes the representation, so it is part of the tag.
+        etag = make_etag(self.collection, lookup, updated_at.isoformat(), self.cache_scope(request), request.get_full_path())
+        return self.conditional_response(request, etag, updated_at, super().retrieve, *args, **kwargs)
+
+    def conditional_response(self, request, etag, updated_at, handler, *args, **kwargs):
+        last_modified = int(updated_at.timestamp())
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            response["Last-Modified"] = http_date(last_modified)
+            self.patch_cache_headers(response)
+        return response
+
+    def patch_cache_headers(self, response):
+        if self.public_cache:
+            max_age = http_cache_setting("PUBLIC_MAX_AGE")
+            patch_cache_control(response, public=True, max_age=max_age, s_maxage=max_age)
+        else:
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ["Authorization"])
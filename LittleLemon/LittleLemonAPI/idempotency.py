@@ -0,0 +1,174 @@
+import hashlib
+import json
+import time
+from datetime import timedelta
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+IDEMPOTENCY_HEADER = "HTTP_IDEMPOTENCY_KEY"
+IDEMPOTENCY_DEFAULTS = {
+    "TTL": 24 * 60 * 60,
+    "LOCK_TIMEOUT": 5,
+    "LEASE": 30,
+    "POLL_INTERVAL": 0.1,
+    "MAX_TRIES": 3,
+    "PURGE_BATCH_SIZE": 1000,
+}
+
+
+def idempotency_setting(name):
+    return getattr(settings, "IDEMPOTENCY", {}).get(name, IDEMPOTENCY_DEFAULTS.get(name))
+
+
+def request_fingerprint(request):
+    body = json.dumps(request.data, sort_keys=True, default=str)
+    return hashlib.sha256((request.method + request.path + body).encode()).hexdigest()
+
+
+def get_record(request):
+    """
+    Return the live (unexpired) record for the request's Idempotency-Key, if any.
+    """
+    key = request.META.get(IDEMPOTENCY_HEADER)
+    if not key or not request.user.is_authenticated:
+        return None
+    return IdempotencyKey.objects.filter(user=request.user, key=key, expires_at__gt=timezone.now()).first()
+
+
+def replay(record, request):
+    if record.fingerprint != request_fingerprint(request):
+        return Response(status=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                        data={"message": "Idempotency-Key was already used with a different request"})
+    return Response(record.response, status=record.status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def is_stale(record):
+    """
+    An in-flight record whose request has held the key longer than the lease;
+    its worker most likely died before storing a response.
+    """
+    lease = timedelta(seconds=idempotency_setting("LEASE"))
+    return record.status_code is None and record.created_at < timezone.now() - lease
+
+
+def release_stale(user, key):
+    """
+    Drop an expired record, or an in-flight one whose lease has run out, so the
+    key can be taken again.
+    """
+    now = timezone.now()
+    lease_start = now - timedelta(seconds=idempotency_setting("LEASE"))
+    IdempotencyKey.objects.filter(user=user, key=key).filter(
+        Q(expires_at__lte=now) | Q(status_code__isnull=True, created_at__lt=lease_start)).delete()
+
+
+def wait_for_record(request):
+    """
+    Wait for a concurrent request holding the same key to finish, then replay its
+    response. Returns None when the key was released and can be taken over.
+    """
+    deadline = time.monotonic() + idempotency_setting("LOCK_TIMEOUT")
+    while time.monotonic() < deadline:
+        record = get_record(request)
+        if record is None or is_stale(record):
+            return None
+        if record.status_code is not None:
+            return replay(record, request)
+        time.sleep(idempotency_setting("POLL_INTERVAL"))
+    return in_progress()
+
+
+def in_progress():
+    return Response(status=status.HTTP_409_CONFLICT,
+                    data={"message": "A request with this Idempotency-Key is still in progress"})
+
+
+def acquire(request, key):
+    """
+    Take the key by inserting its in-flight record. Returns (record, None) on
+    success, or (None, response) when another request holds or finished it.
+    """
+    for _ in range(idempotency_setting("MAX_TRIES")):
+        release_stale(request.user, key)
+        try:
+            with transaction.atomic():
+                record = IdempotencyKey.objects.create(
+                    user=request.user, key=key, fingerprint=request_fingerprint(request),
+                    expires_at=timezone.now() + timedelta(seconds=idempotency_setting("TTL")))
+            return record, None
+        except IntegrityError:
+            response = wait_for_record(request)
+            if response is not None:
+                return None, response
+    return None, in_progress()
+
+
+def store_response(record, response):
+    # update() rather than save(): the row may have been taken over after a lease ran out.
+    IdempotencyKey.objects.filter(pk=record.pk).update(status_code=response.status_code, response=response.data)
+
+
+def purge_expired(batch_size=None):
+    """
+    Delete expired keys in batches of ids and return how many were removed.
+    """
+    batch_size = batch_size or idempotency_setting("PURGE_BATCH_SIZE")
+    deleted = 0
+    while True:
+        ids = list(IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+                   .order_by().values_list("pk", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += IdempotencyKey.objects.filter(pk__in=ids).delete()[0]
+
+
+def idempotent(handler):
+    """
+    Store the first response for an Idempotency-Key and replay it for retries without
+    running the view again. The unique (user, key) row doubles as the lock that
+    serializes concurrent duplicates, and the response is stored in the view's own
+    transaction, so the work and its recorded outcome commit (or vanish) together.
+    """
+    @wraps(handler)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(IDEMPOTENCY_HEADER)
+        if not key or not request.user.is_authenticated:
+            return handler(self, request, *args, **kwargs)
+        if len(key) > 255:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"message": "Idempotency-Key is too long"})
+        record, response = acquire(request, key)
+        if response is not None:
+            return response
+        try:
+            with transaction.atomic():
+                response = handler(self, request, *args, **kwargs)
+                if response.status_code < 500:
+                    store_response(record, response)
+        except Exception:
+            record.delete()
+            raise
+        if response.status_code >= 500:
+            # Server errors are not final; let the client retry for real.
+            record.delete()
+        return response
+    return wrapper
+
+
+class IdempotentThrottleMixin:
+    """
+    Don't charge replays of a completed Idempotency-Key against the throttle budget.
+    """
+    def check_throttles(self, request):
+        if request.method == "POST":
+            record = get_record(request)
+            if record is not None and record.status_code is not None:
+                return
+        super().check_throttles(request)
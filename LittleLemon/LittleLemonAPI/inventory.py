@@ -0,0 +1,52 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from django.utils import timezone
+
+from .conditional import bump_version_on_commit, get_version
+from .models import MenuItem
+
+
+class SoldOut(Exception):
+    def __init__(self, menuitem_id):
+        super().__init__(menuitem_id)
+        self.menuitem_id = menuitem_id
+
+
+def reserve_stock(lines):
+    """
+    Take `quantity` units of each (menuitem_id, quantity) line out of stock. Each
+    decrement is a conditional UPDATE, so concurrent checkouts can never oversell;
+    raises SoldOut for the first line that can't be filled. Call it inside the
+    checkout transaction so a failure rolls back every earlier decrement.
+    """
+    ids = [menuitem_id for menuitem_id, _ in lines]
+    tracked = set(MenuItem.objects.filter(id__in=ids, inventory__isnull=False).values_list("id", flat=True))
+    if not tracked:
+        return
+    now = timezone.now()
+    # A fixed lock order keeps concurrent multi-item checkouts from deadlocking.
+    for menuitem_id, quantity in sorted(lines):
+        if menuitem_id not in tracked:
+            continue
+        if not MenuItem.objects.filter(id=menuitem_id, inventory__gte=quantity).update(
+                inventory=F("inventory") - quantity, updated_at=now):
+            raise SoldOut(menuitem_id)
+    names = ["menu-items"]
+    if MenuItem.objects.filter(id__in=tracked, inventory=0).exists():
+        names.append("availability")
+    bump_version_on_commit(*names)
+
+
+def sold_out_ids():
+    """
+    Ids of menu items with no stock left. Cached per availability version, which
+    changes only when an item sells out or a menu item is edited (e.g. restocked).
+    """
+    version, _ = get_version("availability")
+    key = "menu-items:sold-out:%s" % version
+    ids = cache.get(key)
+    if ids is None:
+        ids = frozenset(MenuItem.objects.filter(inventory=0).values_list("id", flat=True))
+        cache.set(key, ids, getattr(settings, "SOLD_OUT_CACHE_TIMEOUT", 300))
+    return ids
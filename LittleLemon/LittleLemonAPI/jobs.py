@@ -0,0 +1,155 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, F, Max, Min, Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+JOB_DEFAULTS = {
+    "MAX_ATTEMPTS": 5,
+    "RETRY_BACKOFF": 5,
+    "RETRY_BACKOFF_MAX": 600,
+    "BATCH_SIZE": 10,
+    "VISIBILITY_TIMEOUT": 300,
+    "METRICS_WINDOW": 60 * 60,
+    "RETENTION": 7 * 24 * 60 * 60,
+    "PRUNE_BATCH_SIZE": 1000,
+}
+
+registry = {}
+
+
+def job_setting(name):
+    return getattr(settings, "JOBS", {}).get(name, JOB_DEFAULTS.get(name))
+
+
+def job(name):
+    """
+    Register a function as a background job under the given name.
+    """
+    def decorator(func):
+        registry[name] = func
+        return func
+    return decorator
+
+
+def enqueue(name, run_at=None, **payload):
+    """
+    Queue a job to run once the current transaction commits, so workers never see
+    jobs for rows that were rolled back.
+    """
+    def create_job():
+        Job.objects.create(name=name, payload=payload, run_at=run_at or timezone.now(),
+                           max_attempts=job_setting("MAX_ATTEMPTS"))
+    transaction.on_commit(create_job)
+
+
+def backoff(attempts):
+    """
+    Exponential retry delay in seconds for a job that has failed `attempts` times.
+    """
+    delay = job_setting("RETRY_BACKOFF") * (2 ** (attempts - 1))
+    return min(delay, job_setting("RETRY_BACKOFF_MAX"))
+
+
+def claim_jobs(limit=None):
+    """
+    Claim up to `limit` due jobs. Each job is flipped to running with a conditional
+    update, so two workers racing for the same row cannot both win. Jobs left
+    running longer than VISIBILITY_TIMEOUT belonged to a worker that died and are
+    claimed again (or failed, if they have no attempts left).
+    """
+    now = timezone.now()
+    limit = limit or job_setting("BATCH_SIZE")
+    stale_before = now - timedelta(seconds=job_setting("VISIBILITY_TIMEOUT"))
+    abandoned = Q(status=Job.RUNNING, started_at__lt=stale_before)
+    Job.objects.filter(abandoned, attempts__gte=F("max_attempts")).update(
+        status=Job.FAILED, finished_at=now, last_error="Worker stopped before the job finished")
+    claimable = Q(status=Job.PENDING, run_at__lte=now) | abandoned
+    candidates = Job.objects.filter(claimable).order_by("run_at").values_list("id", flat=True)[:limit]
+    claimed = []
+    for job_id in list(candidates):
+        updated = Job.objects.filter(claimable, id=job_id).update(
+            status=Job.RUNNING, started_at=now, attempts=F("attempts") + 1)
+        if updated:
+            claimed.append(job_id)
+    return list(Job.objects.filter(id__in=claimed))
+
+
+def run_job(job):
+    """
+    Run a claimed job and record the outcome, rescheduling it with backoff on failure.
+    """
+    func = registry.get(job.name)
+    try:
+        if func is None:
+            raise LookupError("No job registered under " + job.name)
+        func(**job.payload)
+    except Exception:
+        job.last_error = traceback.format_exc()
+        if job.attempts < job.max_attempts:
+            job.status = Job.PENDING
+            job.run_at = timezone.now() + timedelta(seconds=backoff(job.attempts))
+            logger.warning("Job %s (%s) failed, retry %s scheduled", job.id, job.name, job.attempts)
+        else:
+            job.status = Job.FAILED
+            job.finished_at = timezone.now()
+            logger.error("Job %s (%s) failed permanently", job.id, job.name)
+        job.save(update_fields=["status", "run_at", "last_error", "finished_at"])
+        return False
+    job.status = Job.DONE
+    job.finished_at = timezone.now()
+    job.save(update_fields=["status", "finished_at"])
+    return True
+
+
+def prune_jobs(batch_size=None):
+    """
+    Delete done and failed jobs that finished more than RETENTION seconds ago, in
+    batches of ids, and return how many were removed.
+    """
+    batch_size = batch_size or job_setting("PRUNE_BATCH_SIZE")
+    finished_before = timezone.now() - timedelta(seconds=job_setting("RETENTION"))
+    expired = Job.objects.filter(status__in=[Job.DONE, Job.FAILED], finished_at__lt=finished_before)
+    deleted = 0
+    while True:
+        ids = list(expired.order_by().values_list("id", flat=True)[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Job.objects.filter(id__in=ids).delete()[0]
+
+
+def queue_metrics():
+    """
+    Queue depth per status and latency figures (in seconds) for jobs that finished
+    within the last METRICS_WINDOW seconds.
+    """
+    depth = {status: 0 for status, _ in Job.STATUS_CHOICES}
+    for row in Job.objects.values("status").annotate(count=Count("id")):
+        depth[row["status"]] = row["count"]
+    now = timezone.now()
+    due = Job.objects.filter(status=Job.PENDING, run_at__lte=now).aggregate(count=Count("id"), oldest=Min("run_at"))
+    window_start = now - timedelta(seconds=job_setting("METRICS_WINDOW"))
+    done = Job.objects.filter(status=Job.DONE, finished_at__gte=window_start).aggregate(
+        wait=Avg(F("started_at") - F("created_at")),
+        run=Avg(F("finished_at") - F("started_at")),
+        max_run=Max(F("finished_at") - F("started_at")),
+    )
+
+    def seconds(value):
+        return value.total_seconds() if value is not None else None
+
+    return {
+        "depth": depth,
+        "due": due["count"],
+        "oldest_due_age": seconds(now - due["oldest"]) if due["oldest"] else None,
+        "avg_wait": seconds(done["wait"]),
+        "avg_run": seconds(done["run"]),
+        "max_run": seconds(done["max_run"]),
+    }
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.archive import DEFAULT_BATCH_SIZE, archive_orders, cutoff_date
+
+
+class Command(BaseCommand):
+    help = "Move delivered orders older than a cutoff into the archive table."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--older-than", type=int, required=True, help="Age in days of the orders to archive.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Orders moved per transaction.")
+
+    def handle(self, *args, **options):
+        cutoff = cutoff_date(options["older_than"])
+        moved = archive_orders(cutoff, batch_size=options["batch_size"])
+        self.stdout.write("Archived %s delivered order(s) dated before %s" % (moved, cutoff))
@@ -0,0 +1,31 @@
+import json
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from LittleLemonAPI.menu_import import DEFAULT_CHUNK_SIZE, import_menu, parse_rows
+
+
+class Command(BaseCommand):
+    help = "Create or reprice menu items in bulk from a CSV or JSON file."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV or JSON file with title, price, featured and category columns.")
+        parser.add_argument("--format", choices=["csv", "json"], help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows per bulk query.")
+        parser.add_argument("--dry-run", action="store_true", help="Validate and report without writing.")
+
+    def handle(self, *args, **options):
+        path = Path(options["path"])
+        if not path.exists():
+            raise CommandError("File not found: %s" % path)
+        format = options["format"] or path.suffix.lstrip(".").lower()
+        try:
+            rows = parse_rows(path.read_text(encoding="utf-8"), format)
+        except ValueError as error:
+            raise CommandError(str(error))
+        summary = import_menu(rows, chunk_size=options["chunk_size"], dry_run=options["dry_run"])
+        if summary["errors"]:
+            self.stderr.write(json.dumps(summary["errors"], indent=2))
+            raise CommandError("%s invalid row(s), nothing imported" % len(summary["errors"]))
+        self.stdout.write("Created %(created)s, updated %(updated)s menu items and created %(categories_created)s categories" % summary)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from LittleLemonAPI.idempotency import idempotency_setting, purge_expired
+
+
+class Command(BaseCommand):
+    help = "Delete expired Idempotency-Key records. Run it periodically, e.g. from cron."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=idempotency_setting("PURGE_BATCH_SIZE"),
+                            help="Keys deleted per statement.")
+
+    def handle(self, *args, **options):
+        deleted = purge_expired(options["batch_size"])
+        self.stdout.write("Deleted %s expired idempotency key(s)" % deleted)
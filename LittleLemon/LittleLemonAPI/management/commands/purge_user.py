@@ -0,0 +1,29 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from LittleLemonAPI.jobs import enqueue
+from LittleLemonAPI.purge import DEFAULT_CHUNK_SIZE, purge_user
+
+
+class Command(BaseCommand):
+    help = "Delete a user and everything that cascades from them in bounded chunks."
+
+    def add_arguments(self, parser):
+        parser.add_argument("username")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows deleted per transaction.")
+        parser.add_argument("--background", action="store_true", help="Queue the purge for the job workers instead.")
+
+    def handle(self, *args, **options):
+        user_id = User.objects.filter(username=options["username"]).values_list("id", flat=True).first()
+        if user_id is None:
+            raise CommandError("User %s does not exist" % options["username"])
+        if options["background"]:
+            enqueue("purge_user", user_id=user_id, chunk_size=options["chunk_size"])
+            self.stdout.write("Queued purge of %s" % options["username"])
+            return
+
+        def progress(label, done):
+            self.stdout.write("  %s: %s row(s)" % (label, done))
+
+        purge_user(user_id, chunk_size=options["chunk_size"], progress=progress)
+        self.stdout.write("Purged %s" % options["username"])
@@ -0,0 +1,87 @@
+import json
+import logging
+import multiprocessing
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, close_old_connections, connections
+
+from LittleLemonAPI.jobs import claim_jobs, prune_jobs, queue_metrics, run_job
+
+logger = logging.getLogger(__name__)
+
+
+def work(threads, poll_interval, once):
+    """
+    Run `threads` polling loops in the current process until stopped.
+    """
+    workers = [threading.Thread(target=poll, args=(poll_interval, once), daemon=True) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def poll(poll_interval, once):
+    try:
+        while True:
+            close_old_connections()
+            try:
+                jobs = claim_jobs()
+            except OperationalError:
+                # SQLite reports "database is locked" while another worker writes.
+                jobs = []
+            for job in jobs:
+                try:
+                    run_job(job)
+                except OperationalError:
+                    # The outcome couldn't be saved; the job stays running until
+                    # VISIBILITY_TIMEOUT and is then claimed again.
+                    logger.exception("Could not record the outcome of job %s (%s)", job.id, job.name)
+            if once and not jobs:
+                return
+            if not jobs:
+                time.sleep(poll_interval)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Run background job workers."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--processes", type=int, default=1, help="Number of worker processes.")
+        parser.add_argument("--threads", type=int, default=1, help="Number of worker threads per process.")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty.")
+        parser.add_argument("--once", action="store_true", help="Exit once no due jobs are left.")
+        parser.add_argument("--stats", action="store_true", help="Print queue depth and latency metrics and exit.")
+        parser.add_argument("--prune", action="store_true", help="Delete finished jobs older than RETENTION and exit.")
+
+    def handle(self, *args, **options):
+        if options["stats"]:
+            self.stdout.write(json.dumps(queue_metrics(), indent=2))
+            return
+        if options["prune"]:
+            self.stdout.write("Deleted %s finished job(s)" % prune_jobs())
+            return
+        processes = max(options["processes"], 1)
+        threads = max(options["threads"], 1)
+        worker_args = (threads, options["poll_interval"], options["once"])
+        self.stdout.write("Starting %s process(es) with %s thread(s) each" % (processes, threads))
+        if processes == 1:
+            work(*worker_args)
+            return
+        # Forked children must not share the parent's database connection.
+        connections.close_all()
+        # Fork explicitly: spawned children would re-import this module without django.setup().
+        context = multiprocessing.get_context("fork")
+        children = [context.Process(target=work, args=worker_args) for _ in range(processes)]
+        for child in children:
+            child.start()
+        try:
+            for child in children:
+                child.join()
+        except KeyboardInterrupt:
+            for child in children:
+                child.terminate()
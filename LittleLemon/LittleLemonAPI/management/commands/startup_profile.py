@@ -0,0 +1,109 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+HARNESS_START = "startup-profile: harness imports start"
+HARNESS_END = "startup-profile: harness imports end"
+
+# Runs in a fresh interpreter so every import is paid for again, like a new worker.
+# The test client is only needed to make the request, so its imports are kept out
+# of both the setup timing and (via the markers) the per-module report.
+PROFILE_SCRIPT = """
+import json, sys, time
+started = time.perf_counter()
+import django
+django.setup()
+from django.conf import settings
+setup = time.perf_counter() - started
+print({harness_start!r}, file=sys.stderr, flush=True)
+from django.test import Client
+print({harness_end!r}, file=sys.stderr, flush=True)
+harness = time.perf_counter() - started - setup
+prewarm = None
+if {prewarm!r}:
+    from LittleLemonAPI.warmup import prewarm as run_prewarm
+    prewarm = run_prewarm()
+settings.ALLOWED_HOSTS = ["*"]
+request_started = time.perf_counter()
+response = Client(raise_request_exception=False).get({url!r})
+print(json.dumps({{
+    "setup": setup,
+    "prewarm": prewarm,
+    "first_response": time.perf_counter() - request_started,
+    "total": time.perf_counter() - started - harness,
+    "status": response.status_code,
+}}))
+"""
+
+
+def parse_importtime(output):
+    """
+    Parse `python -X importtime` output into (module, self_us, cumulative_us) rows,
+    leaving out the profiling harness's own imports.
+    """
+    rows = []
+    in_harness = False
+    for line in output.splitlines():
+        if line in (HARNESS_START, HARNESS_END):
+            in_harness = line == HARNESS_START
+            continue
+        if in_harness or not line.startswith("import time:") or "imported package" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((module.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+class Command(BaseCommand):
+    help = "Report per-module import time and time to first response for a cold worker process."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--url", default="/api/categories/", help="Path requested as the first response.")
+        parser.add_argument("--top", type=int, default=20, help="Number of slowest modules to list.")
+        parser.add_argument("--prewarm", action="store_true", help="Run the pre-warm hook before the first request.")
+        parser.add_argument("--json", action="store_true", help="Print the full report as JSON.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ, DJANGO_SETTINGS_MODULE=settings.SETTINGS_MODULE)
+        script = PROFILE_SCRIPT.format(prewarm=options["prewarm"], url=options["url"],
+                                       harness_start=HARNESS_START, harness_end=HARNESS_END)
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", script],
+                                capture_output=True, text=True, env=env, cwd=settings.BASE_DIR)
+        if result.returncode != 0 or not result.stdout.strip():
+            raise CommandError("Profiling process failed:\n" + result.stderr[-2000:])
+        timings = json.loads(result.stdout.strip().splitlines()[-1])
+        if not 200 <= timings["status"] < 400:
+            raise CommandError("First request to %s failed with status %s; its timings are not meaningful. "
+                               "Check the database is migrated for %s." % (options["url"], timings["status"], settings.SETTINGS_MODULE))
+        modules = parse_importtime(result.stderr)
+        packages = defaultdict(int)
+        for module, self_us, _ in modules:
+            packages[module.split(".")[0]] += self_us
+        report = {
+            "settings": settings.SETTINGS_MODULE,
+            "timings": timings,
+            "modules_imported": len(modules),
+            "slowest_modules": sorted(modules, key=lambda row: row[2], reverse=True)[:options["top"]],
+            "packages": sorted(packages.items(), key=lambda row: row[1], reverse=True)[:options["top"]],
+        }
+        if options["json"]:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+        self.stdout.write("Settings: %s" % report["settings"])
+        self.stdout.write("Modules imported: %s" % report["modules_imported"])
+        self.stdout.write("django.setup(): %.3fs" % timings["setup"])
+        if timings["prewarm"] is not None:
+            self.stdout.write("Prewarm: %.3fs" % timings["prewarm"])
+        self.stdout.write("First response (%s %s): %.3fs" % (options["url"], timings["status"], timings["first_response"]))
+        self.stdout.write("Total: %.3fs" % timings["total"])
+        self.stdout.write("\nSlowest modules (cumulative ms):")
+        for module, _, cumulative_us in report["slowest_modules"]:
+            self.stdout.write("  %8.1f  %s" % (cumulative_us / 1000, module))
+        self.stdout.write("\nImport time by package (self ms):")
+        for package, self_us in report["packages"]:
+            self.stdout.write("  %8.1f  %s" % (self_us / 1000, package))
@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.text import slugify
+
+from .conditional import bump_version
+from .models import Category, MenuItem
+from .serializers import MenuImportRowSerializer
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def parse_rows(content, format):
+    """
+    Turn CSV text or JSON (a list of rows, or {"menu_items": [...]}) into row dicts.
+    """
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(content)))
+    if format == "json":
+        data = json.loads(content) if isinstance(content, str) else content
+        if isinstance(data, dict):
+            data = data.get("menu_items", [])
+        if not isinstance(data, list):
+            raise ValueError("Expected a list of menu items or {\"menu_items\": [...]}")
+        return data
+    raise ValueError("Unsupported format: " + str(format))
+
+
+def chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def import_menu(rows, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Create or reprice menu items (and any missing categories) in bulk. Rows whose
+    title already exists update that item; everything else is created. All rows are
+    validated first and nothing is written if any of them fails.
+    """
+    categories = {category.title: category for category in Category.objects.all()}
+    existing = dict(MenuItem.objects.values_list("title", "id"))
+    seen = set()
+    valid, errors = [], []
+    for line, row in enumerate(rows, start=1):
+        serializer = MenuImportRowSerializer(data=row)
+        if not serializer.is_valid():
+            errors.append({"row": line, "errors": serializer.errors})
+            continue
+        data = serializer.validated_data
+        if data["title"] in seen:
+            errors.append({"row": line, "errors": {"title": ["Duplicate title in import."]}})
+            continue
+        seen.add(data["title"])
+        valid.append(data)
+
+    summary = {"created": 0, "updated": 0, "categories_created": 0, "errors": errors}
+    if errors:
+        return summary
+
+    new_categories = {}
+    for data in valid:
+        title = data["category"]
+        if title not in categories and title not in new_categories:
+            new_categories[title] = Category(title=title, slug=data.get("category_slug") or slugify(title))
+    now = timezone.now()
+    to_create, to_update = [], []
+    for data in valid:
+        item = MenuItem(title=data["title"], price=data["price"], featured=bool(data["featured"]), updated_at=now)
+        if data["title"] in existing:
+            item.id = existing[data["title"]]
+            to_update.append(item)
+        else:
+            to_create.append(item)
+    summary.update(created=len(to_create), updated=len(to_update), categories_created=len(new_categories))
+    if dry_run:
+        return summary
+
+    with transaction.atomic():
+        for batch in chunks(list(new_categories.values()), chunk_size):
+            for category in Category.objects.bulk_create(batch):
+                categories[category.title] = category
+        if new_categories and not all(category.pk for category in new_categories.values()):
+            # Backends that can't return ids from bulk_create need a reload.
+            categories = {category.title: category for category in Category.objects.all()}
+        category_titles = {data["title"]: data["category"] for data in valid}
+        for item in to_create + to_update:
+            item.category = categories[category_titles[item.title]]
+        for batch in chunks(to_create, chunk_size):
+            MenuItem.objects.bulk_create(batch)
+        for batch in chunks(to_update, chunk_size):
+            MenuItem.objects.bulk_update(batch, ["price", "featured", "category", "updated_at"])
+    # Bulk writes skip the model signals, so invalidate cached menus once here.
+    bump_version("categories", "menu-items")
+    return summary
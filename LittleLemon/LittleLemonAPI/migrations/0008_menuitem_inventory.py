@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 08:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('LittleLemonAPI', '0007_archivedorder'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='menuitem',
+            name='inventory',
+            field=models.PositiveSmallIntegerField(blank=True, db_index=True, null=True),
+        ),
+    ]
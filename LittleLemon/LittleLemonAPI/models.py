@@ -1,9 +1,11 @@
 from django.db import models
 from django.contrib.auth.models import User
+from django.core.serializers.json import DjangoJSONEncoder
 
 class Category(models.Model):
     slug = models.SlugField()
     title = models.CharField(max_length=255, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -15,6 +17,8 @@ class MenuItem(models.Model):
     price = models.DecimalField(max_digits=5, decimal_places=2, db_index=True)
     featured = models.BooleanField(db_index=True, default=False)
     category = models.ForeignKey(Category, on_delete=models.PROTECT)
+    inventory = models.PositiveSmallIntegerField(null=True, blank=True, db_index=True)  # null means stock isn't tracked
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return self.title + ' - ' + str(self.price) + ' - ' + str(self.featured) + ' - ' + self.category.title
@@ -35,6 +39,16 @@ class Order(models.Model):
     status = models.BooleanField(db_index=True,  null=True) # type: ignore
     total = models.DecimalField(max_digits=5, decimal_places=2)
     date = models.DateField(db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+class ArchivedOrder(models.Model):
+    # Mirrors Order column for column so the two tables can be UNIONed.
+    user  = models.ForeignKey(User, on_delete=models.CASCADE, related_name='archived_orders')
+    delivery_crew = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='archived_deliveries', null=True)
+    status = models.BooleanField(db_index=True,  null=True) # type: ignore
+    total = models.DecimalField(max_digits=5, decimal_places=2)
+    date = models.DateField(db_index=True)
+    updated_at = models.DateTimeField()
 
 class OrderItem(models.Model):
     order = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -45,3 +59,52 @@ class OrderItem(models.Model):
     
     class Meta:
         unique_together = ('order', 'menuitem',)
+
+class Job(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    last_error = models.TextField(blank=True, default='')
+    run_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+
+    class Meta:
+        indexes = [models.Index(fields=['status', 'run_at']), models.Index(fields=['status', 'finished_at'])]
+
+    def __str__(self):
+        return self.name + ' - ' + self.status + ' - ' + str(self.attempts)
+
+class IdempotencyKey(models.Model):
+    key = models.CharField(max_length=255)
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)  # null while the first request is in flight
+    response = models.JSONField(null=True, encoder=DjangoJSONEncoder)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        unique_together = ('user', 'key',)
+
+class CollectionVersion(models.Model):
+    name = models.CharField(max_length=50, unique=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return self.name + ' - ' + str(self.version)
@@ -0,0 +1,83 @@
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.permissions import SAFE_METHODS
+
+
+def requested_fields(request, available):
+    """
+    Names of the serializer fields a client asked for with `?fields=` / `?omit=`,
+    or None when the full representation is wanted. Only reads are narrowed, so
+    writes are always validated against every field.
+    """
+    if request is None or request.method not in SAFE_METHODS:
+        return None
+    fields = request.query_params.get("fields")
+    omit = request.query_params.get("omit")
+    if not fields and not omit:
+        return None
+    selected = [name for name in available if not fields or name in fields.split(",")]
+    if omit:
+        selected = [name for name in selected if name not in omit.split(",")]
+    return selected
+
+
+def model_field(model, name):
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    return field if field.concrete else None
+
+
+def project_queryset(queryset, serializer_class, request):
+    """
+    Narrow the SQL column list to what the requested serializer fields read and
+    keep only the select_related joins that a nested serializer still needs.
+    """
+    serializer = serializer_class()
+    readable = {name: field for name, field in serializer.fields.items() if not field.write_only}
+    selected = requested_fields(request, readable)
+    if selected is None:
+        return queryset
+    model = queryset.model
+    only = {model._meta.pk.name}
+    related = []
+    for name in selected:
+        field = readable[name]
+        sources = getattr(serializer_class, "field_dependencies", {}).get(name, (field.source,))
+        for source in sources:
+            column = model_field(model, source)
+            if column is None:
+                continue
+            only.add(source)
+            if isinstance(field, serializers.BaseSerializer) and column.is_relation:
+                related.append(source)
+                only.update(source + "__" + nested.source for nested in field.fields.values()
+                            if model_field(column.related_model, nested.source))
+    queryset = queryset.select_related(None)
+    if related:
+        # select_related() with no arguments would follow every foreign key.
+        queryset = queryset.select_related(*related)
+    return queryset.only(*only)
+
+
+class SparseFieldsSerializerMixin:
+    """
+    Drop the fields a client excluded with `?fields=` / `?omit=` from the output.
+    """
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        readable = [name for name, field in self.fields.items() if not field.write_only]
+        selected = requested_fields(self.context.get("request"), readable)
+        if selected is not None:
+            for name in readable:
+                if name not in selected:
+                    self.fields.pop(name)
+
+
+class SparseFieldsetMixin:
+    """
+    Apply `?fields=` / `?omit=` to the viewset's queryset as well as its serializer.
+    """
+    def get_queryset(self):
+        return project_queryset(super().get_queryset(), self.get_serializer_class(), self.request)
@@ -0,0 +1,96 @@
+import logging
+
+from django.contrib.auth.models import User
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models, transaction
+from django.utils import timezone
+
+from .conditional import COLLECTIONS, bump_version
+from .utils import raw_delete
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 500
+
+
+def log_progress(label, done):
+    logger.info("Purged %s: %s", label, done)
+
+
+def has_dependants(model):
+    return bool(model._meta.related_objects)
+
+
+def delete_in_chunks(queryset, chunk_size=DEFAULT_CHUNK_SIZE, progress=log_progress):
+    """
+    Delete the rows of `queryset` one bounded batch of ids at a time, each batch in
+    its own short transaction. Models nothing else points at are removed with a
+    single DELETE per batch; the rest go through Django's cascading delete.
+    """
+    model = queryset.model
+    fast = not has_dependants(model)
+    done = 0
+    while True:
+        ids = list(queryset.order_by().values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            batch = model._base_manager.filter(pk__in=ids)
+            if fast:
+                raw_delete(batch)
+            else:
+                batch.delete()
+        done += len(ids)
+        progress(model._meta.label, done)
+    if fast and done and model in COLLECTIONS:
+        # Raw deletes skip post_delete, so invalidate cached collections here.
+        bump_version(*COLLECTIONS[model])
+    return done
+
+
+def has_field(model, name):
+    try:
+        model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+def nullify_in_chunks(queryset, field, chunk_size=DEFAULT_CHUNK_SIZE, progress=log_progress):
+    """
+    Clear `field` on the rows of `queryset` in bounded batches. update() skips
+    auto_now, so `updated_at` is set here to keep the rows' ETags honest.
+    """
+    model = queryset.model
+    changes = {field: None}
+    if has_field(model, "updated_at"):
+        changes["updated_at"] = timezone.now()
+    done = 0
+    while True:
+        ids = list(queryset.order_by().values_list("pk", flat=True)[:chunk_size])
+        if not ids:
+            break
+        model._base_manager.filter(pk__in=ids).update(**changes)
+        done += len(ids)
+        progress(model._meta.label + "." + field, done)
+    if done and model in COLLECTIONS:
+        bump_version(*COLLECTIONS[model])
+    return done
+
+
+def purge_user(user_id, chunk_size=DEFAULT_CHUNK_SIZE, progress=log_progress):
+    """
+    Delete a user and everything that cascades from them in bounded chunks, so no
+    single transaction holds the database for the whole cascade.
+    """
+    for relation in User._meta.related_objects:
+        if relation.many_to_many:
+            continue
+        queryset = relation.related_model._base_manager.filter(**{relation.field.name: user_id})
+        if relation.on_delete is models.CASCADE:
+            delete_in_chunks(queryset, chunk_size, progress)
+        elif relation.on_delete is models.SET_NULL:
+            nullify_in_chunks(queryset, relation.field.name, chunk_size, progress)
+    deleted, _ = User.objects.filter(pk=user_id).delete()
+    progress("auth.User", deleted)
+    return deleted
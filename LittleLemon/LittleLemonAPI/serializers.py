@@ -2,20 +2,21 @@ from rest_framework import serializers
 from rest_framework.validators import UniqueValidator, UniqueTogetherValidator
 from decimal import Decimal
 from .models import *
+from .projection import SparseFieldsSerializerMixin
 from django.contrib.auth.models import User
 
-class ManagerSerializer(serializers.ModelSerializer):
+class ManagerSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "first_name", "last_name", "is_staff"]
 
-class DeliveryCrewSerializer(serializers.ModelSerializer):
+class DeliveryCrewSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ["id", "username", "email", "first_name", "last_name", "is_staff"]
 
 
-class CategorySerializer(serializers.ModelSerializer):
+class CategorySerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
 
     class Meta:
         model = Category
@@ -23,12 +24,14 @@ class CategorySerializer(serializers.ModelSerializer):
 
 
 # MenuItem Serializer
-class MenuItemSerializer(serializers.ModelSerializer):
+class MenuItemSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
    
 
     price_after_tax = serializers.SerializerMethodField(method_name="calculate_tax")
     category = CategorySerializer(read_only=True)
     category_id = serializers.IntegerField(write_only=True)
+    available = serializers.SerializerMethodField(method_name="is_available")
+    field_dependencies = {"price_after_tax": ("price",), "available": ()}
 
     def validate(self, attrs):
       
@@ -45,6 +48,8 @@ class MenuItemSerializer(serializers.ModelSerializer):
             "price",
             "price_after_tax",
             "featured",
+            "inventory",
+            "available",
             "category",
             "category_id",
         ]
@@ -56,17 +61,36 @@ class MenuItemSerializer(serializers.ModelSerializer):
         
         return product.price * Decimal(1.1)
 
-class CartSerializer(serializers.ModelSerializer):
+    def is_available(self, product: MenuItem):
+        sold_out = self.context.get("sold_out")
+        if sold_out is None:
+            return product.inventory != 0
+        return product.id not in sold_out
+
+class CartSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Cart
         fields = ["id", "user", "menuitem", "quantity", "unit_price", "price"]
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Order
         fields = ["id", "user", "delivery_crew", "status", "total", "date"]
 
-class OrderItemSerializer(serializers.ModelSerializer):
+class OrderItemSerializer(SparseFieldsSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = OrderItem
-        fields = ["id", "order", "menuitem", "quantity", "unit_price", "price"]
\ No newline at end of file
+        fields = ["id", "order", "menuitem", "quantity", "unit_price", "price"]
+
+
+class MenuImportRowSerializer(serializers.Serializer):
+    """
+    One row of a bulk menu import. Validated without touching the database;
+    title uniqueness is checked against a preloaded set by the importer. Empty
+    optional CSV cells fall back to the defaults.
+    """
+    title = serializers.CharField(max_length=100)
+    price = serializers.DecimalField(max_digits=5, decimal_places=2, min_value=0)
+    featured = serializers.BooleanField(default=False, allow_null=True)
+    category = serializers.CharField(max_length=255)
+    category_slug = serializers.SlugField(required=False, allow_blank=True)
@@ -0,0 +1,36 @@
+import logging
+
+from .jobs import job
+from .models import Order
+from .purge import purge_user as purge
+
+logger = logging.getLogger(__name__)
+
+
+@job("order_placed")
+def order_placed(order_id):
+    """
+    Post-checkout hook for a new order. For now it only logs the order; crew
+    notifications, analytics and receipts belong here so they stay off the request.
+    """
+    order = Order.objects.select_related("user").filter(id=order_id).first()
+    if order is None:
+        return
+    logger.info("Order %s placed by %s for %s", order.id, order.user.username, order.total)
+
+
+@job("order_updated")
+def order_updated(order_ids, changes):
+    """
+    Follow-up work after orders are assigned to a crew member or change status.
+    """
+    for order in Order.objects.filter(id__in=order_ids).select_related("delivery_crew"):
+        logger.info("Order %s updated: %s", order.id, changes)
+
+
+@job("purge_user")
+def purge_user(user_id, chunk_size):
+    """
+    Delete a user and their carts, orders and tokens in chunks, off the request path.
+    """
+    purge(user_id, chunk_size)
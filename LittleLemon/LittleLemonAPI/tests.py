@@ -1,3 +1,534 @@
-from django.test import TestCase
+import threading
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import OperationalError, connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from .archive import archive_orders
+from .claims import claim_orders
+from .conditional import get_version
+from .idempotency import purge_expired
+from .inventory import sold_out_ids
+from .jobs import claim_jobs, enqueue, job, prune_jobs, queue_metrics, run_job
+from .management.commands import run_jobs
+from .management.commands.startup_profile import HARNESS_END, HARNESS_START, parse_importtime
+from .menu_import import import_menu, parse_rows
+from .models import ArchivedOrder, Cart, Category, IdempotencyKey, Job, MenuItem, Order
+from .projection import project_queryset
+from .purge import purge_user
+from .serializers import MenuItemSerializer
+
+
+@job("test_failing")
+def failing_job():
+    raise ValueError("boom")
+
+
+def token_client(user):
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION='Token ' + Token.objects.get_or_create(user=user)[0].key)
+    return client
+
+
+def run_concurrently(func, args_list):
+    """
+    Call func(*args) for every entry of `args_list` in its own thread, all released
+    together by a barrier, and return the results in order. Each thread closes its
+    own connection; the first error any thread hit is re-raised.
+    """
+    results = [None] * len(args_list)
+    errors = []
+    barrier = threading.Barrier(len(args_list))
+
+    def run(index, args):
+        try:
+            barrier.wait()
+            results[index] = func(*args)
+        except Exception as error:
+            errors.append(error)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=run, args=(index, args)) for index, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    return results
+
+
+class ClaimOrdersTests(TransactionTestCase):
+    def setUp(self):
+        self.customer = User.objects.create(username='customer')
+        self.crew = Group.objects.create(name='Delivery crew')
+        self.members = []
+        for i in range(8):
+            member = User.objects.create(username='crew%d' % i)
+            member.groups.add(self.crew)
+            self.members.append(member)
+        Order.objects.bulk_create([Order(user=self.customer, total=10, date=date.today()) for _ in range(30)])
+
+    def test_endpoint_claims_unassigned_orders(self):
+        response = token_client(self.members[0]).post('/api/orders/claim/', {'count': 3}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        self.assertEqual(Order.objects.filter(delivery_crew=self.members[0]).count(), 3)
+
+    def test_endpoint_rejects_customers(self):
+        response = token_client(self.customer).post('/api/orders/claim/', {'count': 3}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_concurrent_claims_never_assign_an_order_twice(self):
+        results = run_concurrently(claim_orders, [(member, 5) for member in self.members])
+        claimed = {member.id: order_ids for member, order_ids in zip(self.members, results)}
+        ids = [order_id for order_ids in claimed.values() for order_id in order_ids]
+        self.assertEqual(len(ids), len(set(ids)))
+        self.assertEqual(len(ids), 30)
+        for member in self.members:
+            self.assertEqual(set(Order.objects.filter(delivery_crew=member).values_list('id', flat=True)),
+                             set(claimed[member.id]))
+
+
+class InventoryTests(TransactionTestCase):
+    def setUp(self):
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.item = MenuItem.objects.create(title='Lemon Pasta', price=10, category=category, inventory=5)
+        self.customers = [User.objects.create(username='customer%d' % i) for i in range(20)]
+        Cart.objects.bulk_create([
+            Cart(user=customer, menuitem=self.item, quantity=1, unit_price=10, price=10) for customer in self.customers
+        ])
+
+    def checkout(self, customer):
+        return token_client(customer).post('/api/orders/', format='json')
+
+    def test_checkout_rolls_back_when_sold_out(self):
+        MenuItem.objects.filter(id=self.item.id).update(inventory=0)
+        response = self.checkout(self.customers[0])
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+        self.assertTrue(Cart.objects.filter(user=self.customers[0]).exists())
+
+    def test_parallel_checkouts_never_oversell(self):
+        responses = run_concurrently(self.checkout, [(customer,) for customer in self.customers])
+        results = [response.status_code for response in responses]
+        self.assertEqual(results.count(201), 5)
+        self.assertEqual(results.count(409), 15)
+        self.assertEqual(Order.objects.count(), 5)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.inventory, 0)
+        self.assertEqual(sold_out_ids(), {self.item.id})
+
+
+class JobTests(TestCase):
+    def make_job(self, **kwargs):
+        return Job.objects.create(name=kwargs.pop('name', 'order_placed'), payload=kwargs.pop('payload', {'order_id': 0}),
+                                  run_at=timezone.now(), **kwargs)
+
+    def test_enqueue_waits_for_commit(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            enqueue('order_placed', order_id=1)
+            self.assertFalse(Job.objects.exists())
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Job.objects.get().payload, {'order_id': 1})
+
+    def test_claimed_job_cannot_be_claimed_twice(self):
+        queued = self.make_job()
+        self.assertEqual([claimed.id for claimed in claim_jobs()], [queued.id])
+        self.assertEqual(claim_jobs(), [])
+        queued.refresh_from_db()
+        self.assertEqual((queued.status, queued.attempts), (Job.RUNNING, 1))
+
+    def test_future_jobs_are_not_claimed(self):
+        self.make_job()
+        Job.objects.update(run_at=timezone.now() + timedelta(minutes=1))
+        self.assertEqual(claim_jobs(), [])
+
+    def test_failure_is_retried_with_backoff(self):
+        self.make_job(name='test_failing', payload={}, max_attempts=3)
+        failed = claim_jobs()[0]
+        self.assertFalse(run_job(failed))
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Job.PENDING)
+        self.assertIn('boom', failed.last_error)
+        self.assertGreater(failed.run_at, timezone.now() + timedelta(seconds=4))
+        self.assertEqual(claim_jobs(), [])
+
+    def test_failure_on_last_attempt_is_final(self):
+        self.make_job(name='test_failing', payload={}, max_attempts=1)
+        failed = claim_jobs()[0]
+        self.assertFalse(run_job(failed))
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, Job.FAILED)
+        self.assertIsNotNone(failed.finished_at)
+
+    def test_abandoned_running_job_is_claimed_again(self):
+        abandoned = self.make_job(status=Job.RUNNING, attempts=1,
+                                  started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual([claimed.id for claimed in claim_jobs()], [abandoned.id])
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.attempts, 2)
+        self.assertEqual(claim_jobs(), [])
+
+    def test_abandoned_job_without_attempts_left_fails(self):
+        abandoned = self.make_job(status=Job.RUNNING, attempts=5, max_attempts=5,
+                                  started_at=timezone.now() - timedelta(hours=1))
+        self.assertEqual(claim_jobs(), [])
+        abandoned.refresh_from_db()
+        self.assertEqual(abandoned.status, Job.FAILED)
+
+    def test_worker_survives_a_locked_database_while_saving(self):
+        self.make_job()
+        with mock.patch.object(run_jobs, 'connections'), mock.patch.object(run_jobs, 'close_old_connections'), \
+                mock.patch.object(run_jobs, 'run_job', side_effect=OperationalError('database is locked')):
+            with self.assertLogs(run_jobs.logger, 'ERROR'):
+                run_jobs.poll(0, once=True)
+        self.assertEqual(Job.objects.get().status, Job.RUNNING)
+
+    def test_old_finished_jobs_are_pruned(self):
+        now = timezone.now()
+        old = now - timedelta(days=30)
+        self.make_job(status=Job.DONE, finished_at=old)
+        self.make_job(status=Job.FAILED, finished_at=old)
+        recent = self.make_job(status=Job.DONE, finished_at=now)
+        pending = self.make_job()
+        self.assertEqual(prune_jobs(batch_size=1), 2)
+        self.assertEqual(set(Job.objects.values_list('id', flat=True)), {recent.id, pending.id})
+
+    def test_metrics_only_cover_recent_jobs(self):
+        now = timezone.now()
+        for age, run in ((timedelta(days=1), 100), (timedelta(minutes=1), 2)):
+            self.make_job(status=Job.DONE, started_at=now - age - timedelta(seconds=run), finished_at=now - age)
+        self.assertAlmostEqual(queue_metrics()['max_run'], 2, places=3)
+
+
+class IdempotencyTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        category = Category.objects.create(slug='mains', title='Mains')
+        self.item = MenuItem.objects.create(title='Lemon Pasta', price=10, category=category)
+        self.customer = User.objects.create(username='customer')
+        Token.objects.create(user=self.customer)
+        Cart.objects.create(user=self.customer, menuitem=self.item, quantity=1, unit_price=10, price=10)
+
+    def place_order(self, key='key-1', data=None):
+        return token_client(self.customer).post('/api/orders/', data or {}, format='json', HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_retry_replays_the_first_response(self):
+        first = self.place_order()
+        Cart.objects.create(user=self.customer, menuitem=self.item, quantity=1, unit_price=10, price=10)
+        second = self.place_order()
+        self.assertEqual((first.status_code, second.status_code), (201, 201))
+        self.assertNotIn('Idempotent-Replayed', first.headers)
+        self.assertEqual(second.headers['Idempotent-Replayed'], 'true')
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertTrue(Cart.objects.filter(user=self.customer).exists())
+
+    def test_key_reused_with_a_different_body_is_rejected(self):
+        self.place_order()
+        response = self.place_order(data={'note': 'different'})
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    @override_settings(IDEMPOTENCY={'LOCK_TIMEOUT': 0.2})
+    def test_key_held_by_a_live_request_conflicts(self):
+        IdempotencyKey.objects.create(user=self.customer, key='key-1', fingerprint='', expires_at=timezone.now() + timedelta(days=1))
+        response = self.place_order()
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    def test_stale_in_flight_key_is_taken_over(self):
+        record = IdempotencyKey.objects.create(user=self.customer, key='key-1', fingerprint='',
+                                               expires_at=timezone.now() + timedelta(days=1))
+        IdempotencyKey.objects.filter(pk=record.pk).update(created_at=timezone.now() - timedelta(minutes=5))
+        response = self.place_order()
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.get().status_code, 201)
+
+    def test_order_is_rolled_back_when_its_response_cannot_be_stored(self):
+        with mock.patch('LittleLemonAPI.idempotency.store_response', side_effect=RuntimeError('worker died')):
+            with self.assertRaises(RuntimeError):
+                self.place_order()
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(IdempotencyKey.objects.exists())
+        self.assertEqual(self.place_order().status_code, 201)
+
+    def test_expired_keys_are_purged(self):
+        now = timezone.now()
+        for key, expires_at in (('old-1', now - timedelta(hours=1)), ('old-2', now), ('live', now + timedelta(hours=1))):
+            IdempotencyKey.objects.create(user=self.customer, key=key, fingerprint='', expires_at=expires_at)
+        self.assertEqual(purge_expired(batch_size=1), 2)
+        self.assertEqual(list(IdempotencyKey.objects.values_list('key', flat=True)), ['live'])
+
+    def test_concurrent_duplicates_place_one_order(self):
+        responses = run_concurrently(self.place_order, [()] * 4)
+        self.assertEqual([response.status_code for response in responses], [201] * 4)
+        self.assertEqual(sum('Idempotent-Replayed' in response.headers for response in responses), 3)
+        self.assertEqual(Order.objects.count(), 1)
+
+
+class CollectionVersionTests(TestCase):
+    def test_signal_bumps_the_version_after_commit(self):
+        before, _ = get_version('orders')
+        user = User.objects.create(username='customer')
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            Order.objects.create(user=user, total=1, date=date.today())
+            self.assertEqual(get_version('orders')[0], before)
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(get_version('orders')[0], before + 1)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(slug='mains', title='Mains')
+        self.item = MenuItem.objects.create(title='Lemon Pasta', price=10, category=self.category)
+        self.manager = User.objects.create(username='manager', is_superuser=True)
+        self.client = token_client(self.manager)
+
+    def projected(self, query):
+        request = Request(APIRequestFactory().get('/api/menu-items/' + query))
+        return project_queryset(MenuItem.objects.select_related('category'), MenuItemSerializer, request)
+
+    def test_fields_narrows_the_response(self):
+        response = self.client.get('/api/menu-items/%d/?fields=id,title' % self.item.id)
+        self.assertEqual(response.data, {'id': self.item.id, 'title': 'Lemon Pasta'})
+
+    def test_omit_drops_fields(self):
+        response = self.client.get('/api/menu-items/%d/?omit=category,price_after_tax' % self.item.id)
+        self.assertNotIn('category', response.data)
+        self.assertNotIn('price_after_tax', response.data)
+        self.assertIn('price', response.data)
+
+    def test_writes_are_not_narrowed(self):
+        response = self.client.post('/api/menu-items/?fields=id', {'title': 'Soup', 'price': 4, 'category_id': self.category.id}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertIn('title', response.data)
+
+    def test_only_selects_requested_columns(self):
+        queryset = self.projected('?fields=id,price_after_tax')
+        self.assertEqual(queryset.query.deferred_loading, ({'id', 'price'}, False))
+        self.assertEqual(queryset.query.select_related, False)
+
+    def test_nested_field_keeps_its_join(self):
+        queryset = self.projected('?fields=category')
+        self.assertEqual(queryset.query.select_related, {'category': {}})
+        with CaptureQueriesContext(connection) as queries:
+            list(queryset)[0].category.title
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn('"price"', queries[0]['sql'])
+
+    def test_full_representation_is_untouched(self):
+        queryset = self.projected('')
+        self.assertEqual(queryset.query.deferred_loading, (frozenset(), True))
+        self.assertEqual(queryset.query.select_related, {'category': {}})
+
+    def test_projection_is_part_of_the_etag(self):
+        url = '/api/menu-items/%d/' % self.item.id
+        narrowed = self.client.get(url + '?fields=id')
+        full = self.client.get(url, HTTP_IF_NONE_MATCH=narrowed.headers['ETag'])
+        self.assertNotEqual(full.headers['ETag'], narrowed.headers['ETag'])
+        self.assertEqual(full.status_code, 200)
+        self.assertIn('title', full.data)
+
+
+class MenuImportTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.category = Category.objects.create(slug='mains', title='Mains')
+        self.item = MenuItem.objects.create(title='Lemon Pasta', price=10, category=self.category)
+
+    def test_existing_titles_are_updated_and_new_ones_created(self):
+        rows = parse_rows("title,price,featured,category\n"
+                          "Lemon Pasta,12.50,true,Mains\n"
+                          "Greek Salad,8,false,Starters\n", 'csv')
+        summary = import_menu(rows)
+        self.assertEqual((summary['created'], summary['updated'], summary['categories_created']), (1, 1, 1))
+        self.item.refresh_from_db()
+        self.assertEqual((str(self.item.price), self.item.featured), ('12.50', True))
+        salad = MenuItem.objects.get(title='Greek Salad')
+        self.assertEqual((salad.category.title, salad.category.slug), ('Starters', 'starters'))
+
+    def test_blank_optional_cells_use_defaults(self):
+        rows = parse_rows("title,price,featured,category,category_slug\n"
+                          "Greek Salad,8,,Starters,\n"
+                          "Bruschetta,6,,Starters,\n", 'csv')
+        summary = import_menu(rows)
+        self.assertEqual(summary['errors'], [])
+        self.assertEqual(MenuItem.objects.filter(featured=False, category__slug='starters').count(), 2)
+
+    def test_duplicate_titles_reject_the_whole_import(self):
+        rows = [{'title': 'Soup', 'price': '4', 'category': 'Mains'},
+                {'title': 'Soup', 'price': '5', 'category': 'Mains'}]
+        summary = import_menu(rows)
+        self.assertEqual([error['row'] for error in summary['errors']], [2])
+        self.assertFalse(MenuItem.objects.filter(title='Soup').exists())
+
+    def test_rows_are_written_in_chunks(self):
+        rows = [{'title': 'Dish %d' % i, 'price': '1', 'category': 'Mains'} for i in range(5)]
+        with CaptureQueriesContext(connection) as queries:
+            summary = import_menu(rows, chunk_size=2)
+        inserts = [query for query in queries if query['sql'].startswith('INSERT INTO "LittleLemonAPI_menuitem"')]
+        self.assertEqual(summary['created'], 5)
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(MenuItem.objects.count(), 6)
+
+    def test_endpoint_is_manager_only(self):
+        customer = User.objects.create(username='customer')
+        response = token_client(customer).post('/api/menu-items/bulk/', [], format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_endpoint_imports_for_managers(self):
+        manager = User.objects.create(username='manager')
+        manager.groups.add(Group.objects.create(name='Manager'))
+        response = token_client(manager).post('/api/menu-items/bulk/', [{'title': 'Soup', 'price': '4', 'category': 'Mains'}], format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['created'], 1)
+
+    def test_endpoint_rejects_a_body_that_is_not_a_list(self):
+        manager = User.objects.create(username='manager', is_superuser=True)
+        response = token_client(manager).post('/api/menu-items/bulk/', 5, format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class ArchiveTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.customer = User.objects.create(username='customer')
+        other = User.objects.create(username='other')
+        today = date.today()
+        for days, total in ((1, 1), (40, 2), (50, 3)):
+            Order.objects.create(user=self.customer, total=total, status=True, date=today - timedelta(days=days))
+            Order.objects.create(user=other, total=total, status=True, date=today - timedelta(days=days))
+        archive_orders(today - timedelta(days=30))
+        self.client = token_client(self.customer)
+
+    def list_orders(self, query):
+        results = []
+        url = '/api/orders/' + query
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            results += response.data['results']
+            url = response.data['next']
+        return results
+
+    def test_archive_moves_old_delivered_orders(self):
+        self.assertEqual(Order.objects.count(), 2)
+        self.assertEqual(ArchivedOrder.objects.count(), 4)
+
+    def test_list_without_date_filter_stays_on_the_hot_table(self):
+        self.assertEqual([order['total'] for order in self.list_orders('')], ['1.00'])
+
+    def test_date_filter_reaching_back_includes_the_archive(self):
+        since = (date.today() - timedelta(days=60)).isoformat()
+        orders = self.list_orders('?date_from=%s&ordering=total' % since)
+        self.assertEqual([order['total'] for order in orders], ['1.00', '2.00', '3.00'])
+        self.assertEqual({order['user'] for order in orders}, {self.customer.id})
+
+    def test_date_to_without_lower_bound_includes_the_archive(self):
+        until = (date.today() - timedelta(days=35)).isoformat()
+        orders = self.list_orders('?date_to=%s&ordering=total' % until)
+        self.assertEqual([order['total'] for order in orders], ['2.00', '3.00'])
+
+    def test_invalid_date_is_rejected(self):
+        for query in ('?date_from=bad', '?date_to=2024-02-30'):
+            self.assertEqual(self.client.get('/api/orders/' + query).status_code, 400)
+
+    def test_archive_reach_back_with_sparse_fields(self):
+        since = (date.today() - timedelta(days=60)).isoformat()
+        orders = self.list_orders('?date_from=%s&fields=id,total' % since)
+        self.assertEqual(sorted(order['total'] for order in orders), ['1.00', '2.00', '3.00'])
+        self.assertEqual({tuple(order) for order in orders}, {('id', 'total')})
+
+    def test_archived_order_can_be_retrieved(self):
+        archived = ArchivedOrder.objects.filter(user=self.customer).first()
+        response = self.client.get('/api/orders/%d/' % archived.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], archived.id)
+
+
+class OrderScopeTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.first = User.objects.create(username='first')
+        self.second = User.objects.create(username='second')
+        Order.objects.create(user=self.first, total=1, date=date.today())
+        self.order = Order.objects.create(user=self.second, total=2, date=date.today())
+
+    def test_list_scope_does_not_leak_into_other_requests(self):
+        listed = token_client(self.first).get('/api/orders/')
+        self.assertEqual([order['user'] for order in listed.data['results']], [self.first.id])
+        response = token_client(self.second).get('/api/orders/%d/' % self.order.id)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['id'], self.order.id)
+
+
+class PurgeUserTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create(username='leaving')
+        self.crew = User.objects.create(username='crew')
+        self.other = User.objects.create(username='staying')
+        category = Category.objects.create(slug='mains', title='Mains')
+        item = MenuItem.objects.create(title='Lemon Pasta', price=10, category=category)
+        for user in (self.user, self.other):
+            Cart.objects.create(user=user, menuitem=item, quantity=1, unit_price=10, price=10)
+            Token.objects.create(user=user)
+            Order.objects.create(user=user, total=10, date=date.today())
+            ArchivedOrder.objects.create(user=user, total=10, date=date.today(), updated_at=timezone.now())
+        self.past = timezone.now() - timedelta(days=1)
+        self.delivered = Order.objects.create(user=self.other, delivery_crew=self.user, total=5, date=date.today())
+        Order.objects.filter(pk=self.delivered.pk).update(updated_at=self.past)
+        self.archived_delivery = ArchivedOrder.objects.create(
+            user=self.other, delivery_crew=self.user, total=5, date=date.today(), updated_at=self.past)
+        self.kept = Order.objects.create(user=self.other, delivery_crew=self.crew, total=7, date=date.today())
+
+    def test_purge_removes_the_users_rows(self):
+        self.assertEqual(purge_user(self.user.id, chunk_size=1, progress=lambda label, done: None), 1)
+        self.assertFalse(User.objects.filter(pk=self.user.pk).exists())
+        for model in (Cart, Order, ArchivedOrder, Token):
+            self.assertFalse(model.objects.filter(user_id=self.user.id).exists())
+
+    def test_purge_unassigns_crew_and_bumps_updated_at(self):
+        purge_user(self.user.id, progress=lambda label, done: None)
+        for order in (Order.objects.get(pk=self.delivered.pk), ArchivedOrder.objects.get(pk=self.archived_delivery.pk)):
+            self.assertIsNone(order.delivery_crew_id)
+            self.assertGreater(order.updated_at, self.past)
+
+    def test_purging_archived_orders_invalidates_the_orders_list(self):
+        archived_only = User.objects.create(username='archived-only')
+        ArchivedOrder.objects.create(user=archived_only, total=1, date=date.today(), updated_at=timezone.now())
+        before, _ = get_version('orders')
+        purge_user(archived_only.id, progress=lambda label, done: None)
+        self.assertGreater(get_version('orders')[0], before)
+
+    def test_purge_leaves_other_users_alone(self):
+        purge_user(self.user.id, progress=lambda label, done: None)
+        self.assertEqual(Cart.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(Token.objects.filter(user=self.other).count(), 1)
+        self.assertEqual(Order.objects.filter(user=self.other).count(), 3)
+        self.assertEqual(ArchivedOrder.objects.filter(user=self.other).count(), 2)
+        self.assertEqual(Order.objects.get(pk=self.kept.pk).delivery_crew, self.crew)
+
+
+class StartupProfileTests(TestCase):
+    def test_harness_imports_are_left_out(self):
+        output = '\n'.join([
+            'import time: self [us] | cumulative | imported package',
+            'import time:       100 |        150 | django',
+            HARNESS_START,
+            'import time:      3000 |       3000 | unittest',
+            HARNESS_END,
+            'import time:        20 |         20 |   LittleLemonAPI.views',
+        ])
+        self.assertEqual(parse_importtime(output), [('django', 100, 150), ('LittleLemonAPI.views', 20, 20)])
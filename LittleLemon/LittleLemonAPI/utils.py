@@ -2,4 +2,12 @@ from rest_framework.permissions import BasePermission
 
 class IsManagerOrAdmin(BasePermission):
     def has_permission(self, request, view):
-        return request.user.is_superuser or request.user.groups.filter(name="Manager").exists()
\ No newline at end of file
+        return request.user.is_superuser or request.user.groups.filter(name="Manager").exists()
+
+
+def raw_delete(queryset):
+    """
+    Delete the rows in a single DELETE statement without loading them or sending
+    model signals. Only use it where nothing cascades from the deleted rows.
+    """
+    return queryset._raw_delete(queryset.db)
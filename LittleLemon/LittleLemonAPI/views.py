@@ -1,5 +1,6 @@
 from django.shortcuts import get_object_or_404
 from django.contrib.auth.models import User, Group
+from django.db import transaction
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework import viewsets
@@ -8,16 +9,26 @@ from rest_framework.authentication import TokenAuthentication
 from rest_framework.throttling import UserRateThrottle, AnonRateThrottle
 from .models import *
 from .serializers import *
-from .utils import IsManagerOrAdmin
+from .utils import IsManagerOrAdmin, raw_delete
+from .jobs import enqueue, queue_metrics
+from .idempotency import IdempotentThrottleMixin, idempotent
+from .conditional import ConditionalGetMixin, bump_version
+from .projection import SparseFieldsetMixin, project_queryset
+from .menu_import import import_menu, parse_rows
+from .archive import date_range, filter_dates, reaches_archive, union_fields
+from .claims import claim_orders
+from .inventory import SoldOut, reserve_stock, sold_out_ids
 from datetime import datetime
 
-class Categories(viewsets.ModelViewSet):
+class Categories(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing category instances.
     """
     queryset = Category.objects.all()
     authentication_classes = [TokenAuthentication]
     serializer_class = CategorySerializer
+    collection = "categories"
+    public_cache = True
     
     def get_permissions(self):
         """
@@ -30,17 +41,34 @@ class Categories(viewsets.ModelViewSet):
             return [permission() for permission in permission_classes]
         return []
 
-class MenuItems(viewsets.ModelViewSet):
+class MenuItems(ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing menu item instances.
     """
     permission_classes = [IsAuthenticated]
     authentication_classes = [TokenAuthentication]
     throttle_classes = [UserRateThrottle, AnonRateThrottle]
-    queryset = MenuItem.objects.all()
+    queryset = MenuItem.objects.select_related('category')
     serializer_class = MenuItemSerializer
     ordering_fields = ["price", "title"]
+    collection = "menu-items"
     search_fields = ['title', 'category__title']
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method == 'GET':
+            # Writes report availability from the saved row instead.
+            context['sold_out'] = sold_out_ids()
+        return context
+
+    def filter_queryset(self, queryset):
+        """
+        Hide sold-out items when `?available=true` is given.
+        """
+        queryset = super().filter_queryset(queryset)
+        if self.request.query_params.get('available') == 'true':
+            queryset = queryset.exclude(id__in=sold_out_ids())
+        return queryset
     
     def list(self, request, *args, **kwargs):
         """
@@ -91,7 +119,7 @@ class MenuItems(viewsets.ModelViewSet):
         """
         return super().partial_update(request, *args, **kwargs)
 
-class CartMenuItems(viewsets.ModelViewSet):
+class CartMenuItems(IdempotentThrottleMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing cart instances.
     """
@@ -109,11 +137,12 @@ class CartMenuItems(viewsets.ModelViewSet):
         """
         current_user = request.user
         if current_user.is_authenticated:
-            queryset = Cart.objects.filter(user=current_user)
-            serializer = CartSerializer(queryset, many=True)
+            queryset = project_queryset(Cart.objects.filter(user=current_user), CartSerializer, request)
+            serializer = CartSerializer(queryset, many=True, context=self.get_serializer_context())
             return Response(serializer.data)
         return Response(status=status.HTTP_403_FORBIDDEN)
         
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Add a menu item to the cart. Only authenticated users, delivery crew, superusers, or managers can add.
@@ -138,13 +167,12 @@ class CartMenuItems(viewsets.ModelViewSet):
         """
         current_user = request.user
         if current_user.is_authenticated:
-            carts = Cart.objects.filter(user=current_user)
-            if not carts:
+            deleted = raw_delete(Cart.objects.filter(user=current_user))
+            if not deleted:
                 return Response(status=status.HTTP_404_NOT_FOUND, data={"message": "Cart is empty"})
-            carts.delete()
             return Response(status=status.HTTP_200_OK)
 
-class Orders(viewsets.ModelViewSet):
+class Orders(IdempotentThrottleMixin, ConditionalGetMixin, SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing order instances.
     """
@@ -154,33 +182,62 @@ class Orders(viewsets.ModelViewSet):
     queryset = Order.objects.all()
     serializer_class = OrderSerializer
     ordering_fields = ["date", "total"]
+    collection = "orders"
     search_fields = ['date', 'total', 'status', 'user__username']
-    
+    scope = {}
+
+    def get_queryset(self):
+        """
+        Restrict the orders to the requesting user's scope, set per request by `list`.
+        """
+        return super().get_queryset().filter(**self.scope)
+
     def list(self, request, *args, **kwargs):
         """
         List all orders. Managers and superusers can view all orders. Delivery crew can view their orders. Users can view their own orders.
         """
         current_user = request.user
         if current_user.groups.filter(name='Manager').exists() or request.user.is_superuser:
-            Orders.queryset = Order.objects.all()
-            return super().list(request, *args, **kwargs)
-        if current_user.groups.filter(name='Delivery crew').exists():
-            Orders.queryset = Order.objects.filter(delivery_crew=current_user)
-            return super().list(request, *args, **kwargs)
-        if current_user.is_authenticated:
-            Orders.queryset = Order.objects.filter(user=current_user)
-            return super().list(request, *args, **kwargs)
+            self.scope = {}
+        elif current_user.groups.filter(name='Delivery crew').exists():
+            self.scope = {'delivery_crew': current_user}
+        elif current_user.is_authenticated:
+            self.scope = {'user': current_user}
+        else:
+            return
+        return super().list(request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        """
+        Apply the `date_from`/`date_to` filter. Archived orders are only queried when
+        the range can reach them: `date_from` is on or before the newest archived date,
+        or only `date_to` is given.
+        """
+        date_from, date_to = date_range(self.request)
+        queryset = super().filter_queryset(filter_dates(queryset, date_from, date_to))
+        if self.action != 'list' or not reaches_archive(date_from, date_to):
+            return queryset
+        archived = super().filter_queryset(filter_dates(ArchivedOrder.objects.filter(**self.scope), date_from, date_to))
+        ordering = queryset.query.order_by or ['-date', '-id']
+        fields = union_fields(queryset, ordering)
+        return queryset.order_by().only(*fields).union(archived.order_by().only(*fields), all=True).order_by(*ordering)
         
     def retrieve(self, request, *args, **kwargs):
         """
         Retrieve an order. Only the user who placed the order can view it.
         """
         order_id = kwargs.get('pk')
-        order = get_object_or_404(Order, id=kwargs.get('pk'))
-        if order.user != request.user:
+        owner_id = Order.objects.filter(id=order_id).values_list('user_id', flat=True).first()
+        if owner_id is None:
+            archived = get_object_or_404(ArchivedOrder, id=order_id)
+            if archived.user_id != request.user.id:
+                return Response(status=status.HTTP_403_FORBIDDEN, data={"message": "You are not authorized to view this order"})
+            return Response(self.get_serializer(archived).data)
+        if owner_id != request.user.id:
             return Response(status=status.HTTP_403_FORBIDDEN, data={"message": "You are not authorized to view this order"})
         return super().retrieve(request, *args, **kwargs)
         
+    @idempotent
     def create(self, request, *args, **kwargs):
         """
         Create a new order from the user's cart. Only authenticated users can create.
@@ -188,16 +245,23 @@ class Orders(viewsets.ModelViewSet):
         current_user = request.user
         if not current_user.is_authenticated:
             return Response(status=status.HTTP_403_FORBIDDEN)
-        total = 0
-        user_cart = Cart.objects.filter(user=current_user)
-        for cart in user_cart:
-            total += cart.price
-        order = Order(user=current_user, total=total, date=datetime.now())
-        order.save()
-        for cart in user_cart:
-            order_item = OrderItem(order=current_user, menuitem=cart.menuitem, quantity=cart.quantity, unit_price=cart.unit_price, price=cart.price)
-            order_item.save()
-        user_cart.delete()
+        try:
+            with transaction.atomic():
+                total = 0
+                user_cart = list(Cart.objects.filter(user=current_user))
+                reserve_stock([(cart.menuitem_id, cart.quantity) for cart in user_cart])
+                for cart in user_cart:
+                    total += cart.price
+                order = Order(user=current_user, total=total, date=datetime.now())
+                order.save()
+                for cart in user_cart:
+                    order_item = OrderItem(order=current_user, menuitem_id=cart.menuitem_id, quantity=cart.quantity, unit_price=cart.unit_price, price=cart.price)
+                    order_item.save()
+                raw_delete(Cart.objects.filter(user=current_user))
+                enqueue("order_placed", order_id=order.id)
+        except SoldOut as error:
+            title = MenuItem.objects.filter(id=error.menuitem_id).values_list('title', flat=True).first()
+            return Response(status=status.HTTP_409_CONFLICT, data={"message": "%s is sold out" % title})
         return Response(status=status.HTTP_201_CREATED)
         
     def update(self, request, *args, **kwargs):
@@ -213,9 +277,8 @@ class Orders(viewsets.ModelViewSet):
         Delete an order. Only managers or superusers can delete.
         """
         if request.user.groups.filter(name='Manager').exists() or request.user.is_superuser:
-            order = Order.objects.get(id=kwargs.get('pk'))
-            if order:
-                order.delete()
+            if raw_delete(Order.objects.filter(id=kwargs.get('pk'))):
+                bump_version("orders")
                 return Response(status=status.HTTP_200_OK)
             return Response(status=status.HTTP_404_NOT_FOUND)
         return Response(status=status.HTTP_403_FORBIDDEN)
@@ -228,22 +291,40 @@ class Orders(viewsets.ModelViewSet):
             user_id = request.data.get('delivery_crew')
             orders = Order.objects.filter(user__id=kwargs.get('pk'))
             if orders:
-                for order in orders:
-                    order.delivery_crew = User.objects.get(id=user_id)
-                    order.save()
+                with transaction.atomic():
+                    for order in orders:
+                        order.delivery_crew = User.objects.get(id=user_id)
+                        order.save()
+                    enqueue("order_updated", order_ids=[order.id for order in orders], changes={"delivery_crew": user_id})
                 return Response(status=status.HTTP_200_OK)
             return Response(status=status.HTTP_404_NOT_FOUND)
         elif request.user.groups.filter(name='Delivery crew').exists():
             orders = Order.objects.filter(user_id=kwargs.get('pk'))
             if orders:
-                for order in orders:
-                    order.status = request.data.get('status')
-                    order.save()
+                with transaction.atomic():
+                    for order in orders:
+                        order.status = request.data.get('status')
+                        order.save()
+                    enqueue("order_updated", order_ids=[order.id for order in orders], changes={"status": request.data.get('status')})
                 return Response(status=status.HTTP_200_OK)
             return Response(status=status.HTTP_404_NOT_FOUND)
         return Response(status=status.HTTP_403_FORBIDDEN)
 
-class ManagerUsers(viewsets.ModelViewSet):
+    def claim(self, request, *args, **kwargs):
+        """
+        Claim the next unassigned orders. Only delivery crew can claim.
+        """
+        if not request.user.groups.filter(name='Delivery crew').exists():
+            return Response(status=status.HTTP_403_FORBIDDEN)
+        try:
+            count = int(request.data.get('count', 1))
+        except (TypeError, ValueError):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"message": "count must be a number"})
+        ids = claim_orders(request.user, count)
+        orders = Order.objects.filter(id__in=ids)
+        return Response(status=status.HTTP_200_OK, data=self.get_serializer(orders, many=True).data)
+
+class ManagerUsers(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing manager user instances.
     """
@@ -303,7 +384,7 @@ class ManagerUsers(viewsets.ModelViewSet):
             return super().list(request, *args, **kwargs)
         return Response(status=status.HTTP_403_FORBIDDEN)
 
-class DeliveryCrewUsers(viewsets.ModelViewSet):
+class DeliveryCrewUsers(SparseFieldsetMixin, viewsets.ModelViewSet):
     """
     A viewset for viewing and editing delivery crew user instances.
     """
@@ -344,4 +425,44 @@ class DeliveryCrewUsers(viewsets.ModelViewSet):
                 return Response(status=status.HTTP_404_NOT_FOUND)
             user.groups.remove(Group.objects.get(name='Delivery crew'))
             return Response(status=status.HTTP_200_OK, data={"message": "User is removed from Delivery Crew"})
-        return Response({"messages": "not allowed"}, status=status.HTTP_403_FORBIDDEN)
\ No newline at end of file
+        return Response({"messages": "not allowed"}, status=status.HTTP_403_FORBIDDEN)
+
+class JobMetrics(viewsets.ViewSet):
+    """
+    A viewset for monitoring the background job queue.
+    """
+    permission_classes = [IsAuthenticated, IsManagerOrAdmin]
+    authentication_classes = [TokenAuthentication]
+    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+
+    def list(self, request):
+        """
+        Report queue depth and job latency. Only managers or superusers can view.
+        """
+        return Response(queue_metrics())
+
+class MenuImport(viewsets.ViewSet):
+    """
+    A viewset for creating or repricing many menu items at once.
+    """
+    permission_classes = [IsAuthenticated, IsManagerOrAdmin]
+    authentication_classes = [TokenAuthentication]
+    throttle_classes = [UserRateThrottle, AnonRateThrottle]
+
+    def create(self, request):
+        """
+        Import menu items from a JSON body or an uploaded CSV/JSON file. Only managers or superusers can import.
+        """
+        upload = request.FILES.get('file')
+        try:
+            if upload:
+                format = 'json' if upload.name.endswith('.json') else 'csv'
+                rows = parse_rows(upload.read().decode('utf-8'), format)
+            else:
+                rows = parse_rows(request.data, 'json')
+        except (ValueError, UnicodeDecodeError):
+            return Response(status=status.HTTP_400_BAD_REQUEST, data={"message": "Could not parse the menu file"})
+        summary = import_menu(rows)
+        if summary["errors"]:
+            return Response(status=status.HTTP_400_BAD_REQUEST, data=summary)
+        return Response(status=status.HTTP_200_OK, data=summary)
@@ -0,0 +1,46 @@
+import logging
+import time
+
+from django.apps import apps
+from django.db import connections
+from django.urls import get_resolver
+
+logger = logging.getLogger(__name__)
+
+
+def iter_viewsets(patterns):
+    for pattern in patterns:
+        if hasattr(pattern, "url_patterns"):
+            yield from iter_viewsets(pattern.url_patterns)
+        else:
+            view_class = getattr(pattern.callback, "cls", None)
+            if view_class is not None:
+                yield view_class
+
+
+def prewarm():
+    """
+    Do the lazy first-request work up front: model metadata, the URL resolver
+    and every routed serializer's field mapping. It runs at import time, before
+    servers fork their workers, so it must not leave a database connection open
+    for the workers to inherit and share.
+    """
+    started = time.perf_counter()
+    for model in apps.get_models():
+        model._meta.get_fields()
+    resolver = get_resolver()
+    resolver.resolve("/api/menu-items/")
+    serializers = set()
+    for view_class in set(iter_viewsets(resolver.url_patterns)):
+        queryset = getattr(view_class, "queryset", None)
+        if queryset is not None:
+            str(queryset.query)
+        serializer_class = getattr(view_class, "serializer_class", None)
+        if serializer_class is not None and serializer_class not in serializers:
+            serializers.add(serializer_class)
+            serializer_class().fields
+    # Compiling the queries above may have touched the backend; close it before forking.
+    connections.close_all()
+    elapsed = time.perf_counter() - started
+    logger.info("Prewarmed %s serializers in %.3fs", len(serializers), elapsed)
+    return elapsed